@@ -1,66 +1,84 @@
 import streamlit as st
 from streamlit_gsheets import GSheetsConnection
 from streamlit_calendar import calendar
+import numpy as np
 import pandas as pd
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import calendar as py_calendar
 import io
 import os
 
-# PDF/Excel Libraries
-from reportlab.lib.pagesizes import A4, landscape
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from openpyxl import Workbook
-from openpyxl.styles import Alignment, Font, Border, Side, PatternFill
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-
 # ================= CONFIGURATION =================
 st.set_page_config(page_title="Interview Scheduler", layout="wide", page_icon="🕒")
 conn = st.connection("gsheets", type=GSheetsConnection)
 
 # ================= CONSTANTS =================
 # Time range: 09:00 AM to 12:00 AM (24:00)
-TIME_SLOTS = []
-for h in range(9, 24):  # 9 to 23
-    for m in (0, 30):
-        TIME_SLOTS.append(f"{h:02d}:{m:02d}")
+TIME_SLOTS = tuple(f"{h:02d}:{m:02d}" for h in range(9, 24) for m in (0, 30))
 
 # 科目清單
-SUBJECT_OPTIONS = ["中文", "英文", "數學", "生物", "地理", "中史", "歷史", "物理", "化學"]
+SUBJECT_OPTIONS = ("中文", "英文", "數學", "生物", "地理", "中史", "歷史", "物理", "化學")
+_SUBJECT_SET = frozenset(SUBJECT_OPTIONS)  # O(1) 驗證用
 
 # ================= DATA FUNCTIONS =================
 def clean_dataframe(df):
     """清理資料並標準化格式"""
-    # 轉為字串以處理 NaN
-    df = df.astype(str)
-    
-    # 清理無效字串
-    for col in df.columns:
-        if col not in ['LastUpdated']:
-            df[col] = df[col].replace(['NaT', 'nan', 'None', '<NA>'], '')
-            
-    # 處理日期格式
-    df['Date'] = pd.to_datetime(df['Date'], errors='coerce').dt.strftime('%Y-%m-%d')
-    
-    # 處理時間格式 (相容 HH:MM:SS 與 HH:MM)
-    df['Time'] = pd.to_datetime(df['Time'], format='%H:%M:00', errors='coerce').fillna(
-                 pd.to_datetime(df['Time'], format='%H:%M', errors='coerce')
-                 ).dt.strftime('%H:%M')
+    # 已經清理過的 frame (例如 session 裡的資料) 直接回傳，不重複解析
+    if df.attrs.get('_cleaned'):
+        return df
+
+    # 只把文字欄位轉成字串並清掉無效值，LastUpdated 保留原值待後面直接解析
+    for col in ('Name', 'ID', 'Date', 'Time', 'Notes'):
+        if col in df.columns:
+            df[col] = df[col].astype('string').fillna('').replace(
+                {'NaT': '', 'nan': '', 'None': '', '<NA>': ''}, regex=False)
+
+
+    # 處理日期格式 (只解析 unique 值再 map 回去，重複日期很多時快很多)
+    uniq = pd.Series(pd.unique(df['Date'].str.slice(0, 10)))
+    parsed = pd.to_datetime(uniq, format='%Y-%m-%d', errors='coerce')
+    # 非本 app 寫入的格式 (手改/匯入) 補一次推斷解析，不讓它們被洗成空白
+    miss = parsed.isna()
+    if miss.any():
+        parsed[miss] = pd.to_datetime(uniq[miss], errors='coerce')
+    parsed = parsed.dt.strftime('%Y-%m-%d')
+    df['Date'] = df['Date'].str.slice(0, 10).map(dict(zip(uniq, parsed)))
+
+    # 處理時間格式 (相容 HH:MM:SS 與 HH:MM：先截成 HH:MM 再用固定格式解析)
+    df['Time'] = pd.to_datetime(df['Time'].str.slice(0, 5), format='%H:%M',
+                                errors='coerce').dt.strftime('%H:%M')
                  
     df = df.fillna("")
     
-    # 處理 LastUpdated
+    # 處理 LastUpdated (我們自己寫入的格式固定，先走 explicit-format 快路徑)
     if 'LastUpdated' not in df.columns:
         df['LastUpdated'] = pd.NaT
-    df['LastUpdated'] = pd.to_datetime(df['LastUpdated'], errors='coerce')
-    
+    ts = pd.to_datetime(df['LastUpdated'], format='%Y-%m-%d %H:%M:%S', errors='coerce')
+    if ts.isna().any():
+        # 舊資料可能是其他 ISO 變體，補一次 ISO8601 解析
+        ts = ts.fillna(pd.to_datetime(df['LastUpdated'], format='ISO8601', errors='coerce'))
+    df['LastUpdated'] = ts
+
+    # Name/Time 基數很低，轉 categorical 省記憶體且等值比較走整數路徑
+    # (類別 = 固定清單 ∪ 實際出現的值，表外資料如手改/匯入/表定外時段不會被洗成 NaN)
+    for col, fixed in (('Name', SUBJECT_OPTIONS), ('Time', TIME_SLOTS)):
+        cats = list(fixed) + ['']
+        seen = set(cats)
+        cats += [v for v in pd.unique(df[col]) if v not in seen]
+        df[col] = pd.Categorical(df[col], categories=cats)
+
+    df.attrs['_cleaned'] = True
     return df
 
+@st.cache_data(ttl=30, show_spinner=False)
+def _cached_read(version):
+    # version 是 session 的寫入計數；寫入後遞增即可強制重新讀取
+    return conn.read(worksheet="Sheet1", ttl=0)
+
 def load_data_from_google():
     try:
-        df = conn.read(worksheet="Sheet1", ttl=0)
+        df = _cached_read(st.session_state.get('gs_version', 0))
         if df.empty:
             return pd.DataFrame(columns=["Name", "ID", "Date", "Time", "Notes", "LastUpdated"])
         return clean_dataframe(df)
@@ -96,15 +114,18 @@ def refresh_data(force=False):
         st.rerun()
 
 # ================= CONFLICT DETECTION & SAVE =================
+def read_cloud_timestamp():
+    """只讀 LastUpdated 欄做樂觀鎖檢查，避免儲存前再拉整張表"""
+    ts_col = conn.read(worksheet="Sheet1", usecols=['LastUpdated'], ttl=0)
+    if ts_col.empty or 'LastUpdated' not in ts_col.columns:
+        return pd.NaT
+    return pd.to_datetime(ts_col['LastUpdated'], errors='coerce').max()
+
 def save_with_conflict_detection(new_df):
     try:
-        latest_cloud = load_data_from_google()
-        
-        cloud_latest_ts = pd.NaT
-        if not latest_cloud.empty and 'LastUpdated' in latest_cloud.columns:
-            cloud_latest_ts = latest_cloud['LastUpdated'].max()
-            if pd.notna(cloud_latest_ts):
-                cloud_latest_ts = cloud_latest_ts.tz_localize(None)
+        cloud_latest_ts = read_cloud_timestamp()
+        if pd.notna(cloud_latest_ts):
+            cloud_latest_ts = cloud_latest_ts.tz_localize(None)
 
         user_latest_ts = st.session_state.last_cloud_timestamp
         if pd.notna(user_latest_ts):
@@ -126,17 +147,20 @@ def save_with_conflict_detection(new_df):
         
         current_time = pd.Timestamp.now()
         
-        # 重置索引
-        clean_df = clean_dataframe(new_df.copy()).reset_index(drop=True)
+        # 重置索引 (clean_dataframe 會自行重建它要改的欄位，不需整份先 copy)
+        clean_df = clean_dataframe(new_df).reset_index(drop=True)
         
         clean_df['LastUpdated'] = current_time
         
-        # 轉換為字串以上傳
-        upload_df = clean_df.copy()
-        upload_df['LastUpdated'] = upload_df['LastUpdated'].dt.strftime('%Y-%m-%d %H:%M:%S')
+        # 轉換為字串以上傳 (assign 只新建 LastUpdated 一欄，其餘欄位共用)
+        upload_df = clean_df.assign(LastUpdated=clean_df['LastUpdated'].dt.strftime('%Y-%m-%d %H:%M:%S'))
 
         conn.update(worksheet="Sheet1", data=upload_df)
-        
+
+        # 寫入成功後讓快取失效，下次讀取拿到新資料
+        st.session_state.gs_version = st.session_state.get('gs_version', 0) + 1
+        _cached_read.clear()
+
         st.session_state.data = clean_df
         st.session_state.last_cloud_timestamp = current_time
         
@@ -151,121 +175,204 @@ def save_with_conflict_detection(new_df):
             st.write("詳細錯誤資訊：", str(e))
 
 # ================= EXPORT FUNCTIONS =================
+_FONT_NAME = None
+
+def _pdf_font_name():
+    """第一次產生 PDF 時才探測並註冊字型，之後直接重用結果"""
+    global _FONT_NAME
+    if _FONT_NAME is None:
+        from reportlab.pdfbase import pdfmetrics
+        from reportlab.pdfbase.ttfonts import TTFont
+
+        _FONT_NAME = "Helvetica"
+        try:
+            if os.path.exists("font.ttf"):
+                pdfmetrics.registerFont(TTFont('CustomChinese', 'font.ttf'))
+                _FONT_NAME = 'CustomChinese'
+            elif os.path.exists("font.otf"):
+                pdfmetrics.registerFont(TTFont('CustomChinese', 'font.otf'))
+                _FONT_NAME = 'CustomChinese'
+        except Exception as e:
+            print(f"Font loading error: {e}")
+    return _FONT_NAME
+
 def generate_visual_pdf(df):
+    # reportlab 很重，只在真正產生 PDF 時才 import (模組載入後會被 Python 快取)
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+
     buffer = io.BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=landscape(A4), topMargin=30, bottomMargin=30)
     elements = []
-    font_name = "Helvetica"
-    try:
-        if os.path.exists("font.ttf"):
-            pdfmetrics.registerFont(TTFont('CustomChinese', 'font.ttf'))
-            font_name = 'CustomChinese'
-        elif os.path.exists("font.otf"):
-            pdfmetrics.registerFont(TTFont('CustomChinese', 'font.otf'))
-            font_name = 'CustomChinese'
-    except Exception as e:
-        print(f"Font loading error: {e}")
+    font_name = _pdf_font_name()
 
     styles = getSampleStyleSheet()
     title_style = ParagraphStyle('ChineseTitle', parent=styles['Heading1'], fontName=font_name, fontSize=16, leading=20)
     cell_style = ParagraphStyle('ChineseCell', parent=styles['Normal'], fontName=font_name, fontSize=9, leading=11)
     
-    df['dt'] = pd.to_datetime(df['Date'] + " " + df['Time'], errors='coerce')
-    df = df.dropna(subset=['dt'])
-    months = sorted(df['dt'].dt.to_period('M').unique())
-    import calendar as py_calendar
+    # 解析一次 dt 後直接用它分月/分日，之後不再做字串比較
+    df = df.assign(dt=pd.to_datetime(df['Date'] + " " + df['Time'], errors='coerce')).dropna(subset=['dt'])
+    df['_month'] = df['dt'].dt.to_period('M')
+    df['_day'] = df['dt'].dt.day
     cal = py_calendar.Calendar(firstweekday=6)
 
-    for period in months:
+    # 每週一個小 Table：reportlab 的排版成本隨表格列數超線性成長，
+    # 拆成小表讓 flow engine 便宜地分頁
+    header_style = TableStyle([
+        ('GRID', (0,0), (-1,-1), 0.5, colors.black),
+        ('BACKGROUND', (0,0), (-1,0), colors.lightgrey),
+        ('FONTNAME', (0,0), (-1,-1), font_name),
+    ])
+    week_style = TableStyle([
+        ('GRID', (0,0), (-1,-1), 0.5, colors.black),
+        ('VALIGN', (0,0), (-1,-1), 'TOP'),
+        ('FONTNAME', (0,0), (-1,-1), font_name),
+    ])
+
+    def _build_month(period, mdf):
+        """組出單一月份的 flowable 清單；各月彼此獨立，可平行建構"""
         year, month = period.year, period.month
-        elements.append(Paragraph(f"<b>{period.strftime('%B %Y')}</b>", title_style))
-        elements.append(Spacer(1, 10))
-        
-        month_cal = cal.monthdayscalendar(year, month)
-        table_data = [["Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat"]]
-        row_heights = [20]
+        by_day = {d: g.sort_values('dt') for d, g in mdf.groupby('_day', sort=False)}
+        els = [Paragraph(f"<b>{period.strftime('%B %Y')}</b>", title_style), Spacer(1, 10)]
+        els.append(Table([["Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat"]],
+                         colWidths=[110]*7, rowHeights=[20], style=header_style))
 
-        for week in month_cal:
+        for week in cal.monthdayscalendar(year, month):
             row_cells = []
             max_entries = 0
             for day in week:
                 if day == 0:
                     row_cells.append("")
                 else:
-                    day_str = f"{year}-{month:02d}-{day:02d}"
-                    day_data = df[df['Date'] == day_str].sort_values('Time')
+                    day_data = by_day.get(day)
                     cell_text = f"<b>{day}</b>"
-                    if not day_data.empty:
-                        lines = [f"{r['Name']}\n{r['Time']}" for _, r in day_data.iterrows()]
+                    if day_data is not None:
+                        lines = [f"{n}\n{t}" for n, t in
+                                 zip(day_data['Name'].values, day_data['Time'].values)]
                         cell_text += "\n\n" + "\n".join(lines)
                         max_entries = max(max_entries, len(day_data))
                     row_cells.append(Paragraph(cell_text.replace("\n", "<br/>"), cell_style))
-            table_data.append(row_cells)
-            row_heights.append(40 + (max_entries * 25))
-
-        table = Table(table_data, colWidths=[110]*7, rowHeights=row_heights)
-        table.setStyle(TableStyle([
-            ('GRID', (0,0), (-1,-1), 0.5, colors.black),
-            ('VALIGN', (0,0), (-1,-1), 'TOP'),
-            ('BACKGROUND', (0,0), (-1,0), colors.lightgrey),
-            ('FONTNAME', (0,0), (-1,-1), font_name),
-        ]))
-        elements.append(table)
-        elements.append(Spacer(1, 20))
+            els.append(Table([row_cells], colWidths=[110]*7,
+                             rowHeights=[40 + (max_entries * 25)], style=week_style))
+
+        els.append(Spacer(1, 20))
+        return els
+
+    # 各月平行建構，最後依月份順序接回 elements
+    with ThreadPoolExecutor() as pool:
+        for els in pool.map(lambda pm: _build_month(*pm), df.groupby('_month', sort=True)):
+            elements.extend(els)
 
     doc.build(elements)
     buffer.seek(0)
     return buffer
 
 def generate_visual_excel(df):
-    wb = Workbook()
-    wb.remove(wb.active)
+    # openpyxl 同樣延遲到產生 Excel 時才 import
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Font, Border, Side, PatternFill
+
+    # write_only 模式逐列串流寫出，不在記憶體保留整個 sheet model
+    wb = Workbook(write_only=True)
     thin = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
     align = Alignment(horizontal="center", vertical="top", wrap_text=True)
-    import calendar as py_calendar
     cal = py_calendar.Calendar(firstweekday=6)
-    
-    df['dt'] = pd.to_datetime(df['Date'] + " " + df['Time'], errors='coerce')
-    months = sorted(df['dt'].dt.to_period('M').dropna().unique())
 
-    for period in months:
+    df = df.assign(dt=pd.to_datetime(df['Date'] + " " + df['Time'], errors='coerce')).dropna(subset=['dt'])
+    df['_month'] = df['dt'].dt.to_period('M')
+    df['_day'] = df['dt'].dt.day
+
+    # sheet 要先在主執行緒建好 (欄寬/合併範圍必須在 append 前宣告)
+    sheets = []
+    for period, mdf in df.groupby('_month', sort=True):
         ws = wb.create_sheet(f"{period.year}-{period.month:02d}")
-        ws.merge_cells("A1:G1")
-        ws["A1"] = f"{period.strftime('%B %Y')}"
-        ws["A1"].font = Font(size=14, bold=True)
-        ws["A1"].alignment = Alignment(horizontal="center")
-        
-        for i, d in enumerate(["Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat"], 1):
-            c = ws.cell(2, i, d)
+        for i in range(1, 8):
+            ws.column_dimensions[chr(64+i)].width = 20
+        ws.merged_cells.ranges.add("A1:G1")
+        sheets.append((ws, period, mdf))
+
+    def _build_sheet(ws, period, mdf):
+        """只建 WriteOnlyCell 列資料，不動 worksheet 本身 (openpyxl 非 thread-safe)"""
+        by_day = {d: g.sort_values('dt') for d, g in mdf.groupby('_day', sort=False)}
+
+        title = WriteOnlyCell(ws, f"{period.strftime('%B %Y')}")
+        title.font = Font(size=14, bold=True)
+        title.alignment = Alignment(horizontal="center")
+        rows = [[title]]
+        heights = [None]
+
+        header = []
+        for d in ["Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat"]:
+            c = WriteOnlyCell(ws, d)
             c.fill = PatternFill("solid", fgColor="DDDDDD")
             c.font = Font(bold=True)
             c.alignment = Alignment(horizontal="center")
-            ws.column_dimensions[chr(64+i)].width = 20
+            header.append(c)
+        rows.append(header)
+        heights.append(None)
 
-        row_num = 3
         for week in cal.monthdayscalendar(period.year, period.month):
             max_h = 1
-            for col_idx, day in enumerate(week, 1):
-                c = ws.cell(row_num, col_idx)
+            cells = []
+            for day in week:
+                c = WriteOnlyCell(ws)
                 c.border = thin
                 c.alignment = align
                 if day != 0:
-                    day_str = f"{period.year}-{period.month:02d}-{day:02d}"
-                    day_data = df[df['Date'] == day_str].sort_values('Time')
+                    day_data = by_day.get(day)
                     val = f"{day}\n"
-                    if not day_data.empty:
-                        lines = [f"{r['Name']} ({r['Time']})" for _, r in day_data.iterrows()]
+                    if day_data is not None:
+                        lines = [f"{n} ({t})" for n, t in
+                                 zip(day_data['Name'].values, day_data['Time'].values)]
                         val += "\n".join(lines)
                         max_h = max(max_h, len(lines)+1)
                     c.value = val
-            ws.row_dimensions[row_num].height = max(50, max_h * 15)
-            row_num += 1
-            
+                cells.append(c)
+            rows.append(cells)
+            heights.append(max(50, max_h * 15))
+        return rows, heights
+
+    # 各月 cell 清單平行建構，序列化 (append) 留在主執行緒
+    with ThreadPoolExecutor() as pool:
+        built = list(pool.map(lambda args: _build_sheet(*args), sheets))
+
+    for (ws, _, _), (rows, heights) in zip(sheets, built):
+        for row_num, h in enumerate(heights, 1):
+            if h is not None:
+                ws.row_dimensions[row_num].height = h
+        for r in rows:
+            ws.append(r)
+
     buffer = io.BytesIO()
     wb.save(buffer)
     buffer.seek(0)
     return buffer
 
+@st.cache_data(show_spinner=False)
+def _build_pdf(key, records):
+    # key = (列數, 最新 LastUpdated)，資料沒變就直接重用快取的檔案
+    return generate_visual_pdf(pd.DataFrame(records)).getvalue()
+
+@st.cache_data(show_spinner=False)
+def _build_excel(key, records):
+    return generate_visual_excel(pd.DataFrame(records)).getvalue()
+
+@st.cache_data(show_spinner=False)
+def _events_for(tok, records):
+    # tok = 最新 LastUpdated；資料沒變時其他 widget 觸發的 rerun 直接拿快取
+    df_cal = pd.DataFrame(records)
+    mask = df_cal['Date'].astype(bool) & df_cal['Time'].astype(bool)
+    sub = df_cal.loc[mask, ['Name', 'ID', 'Date', 'Time', 'Notes']].reset_index()
+    sub['id'] = sub['index'].astype(str)
+    sub['title'] = sub['Name']
+    sub['start'] = sub['Date'] + 'T' + sub['Time']
+    sub['extendedProps'] = ('ID: ' + sub['ID'] + ' | Notes: ' + sub['Notes']).map(
+        lambda s: {"description": s})
+    return sub[['id', 'title', 'start', 'extendedProps']].to_dict('records')
+
 # ================= MAIN APP LOGIC =================
 initialize_session()
 df = st.session_state.data
@@ -287,21 +394,9 @@ tab1, tab2, tab3 = st.tabs(["📅 Calendar View", "📝 List & Edit", "⚙️ Ex
 # --- TAB 1: CALENDAR ---
 with tab1:
     if not df.empty:
-        df_cal = df.reset_index(drop=True)
-        events = []
-        for index, row in df_cal.iterrows():
-            if row['Date'] and row['Time'] and len(str(row['Date'])) > 0 and len(str(row['Time'])) > 0:
-                try:
-                    start_iso = f"{row['Date']}T{row['Time']}"
-                    events.append({
-                        "id": str(index),
-                        "title": row['Name'],
-                        "start": start_iso,
-                        "extendedProps": {"description": f"ID: {row['ID']} | Notes: {row['Notes']}"}
-                    })
-                except:
-                    continue
-        
+        tok = str(df['LastUpdated'].max())
+        events = _events_for(tok, df[['Name', 'ID', 'Date', 'Time', 'Notes']].to_dict('records'))
+
         calendar(events=events, options={
             "initialView": "dayGridMonth",
             "height": "750px",
@@ -331,23 +426,27 @@ with tab2:
             notes = st.text_area("Notes", key=f"notes_{form_id}")
             
             if st.form_submit_button("Save"):
-                if not name:
+                if name not in _SUBJECT_SET:
                     st.error("Name/Subject required")
                 else:
                     limit_reached = False
                     if limit > 0:
                         check_date = d.strftime("%Y-%m-%d")
-                        existing_count = len(df[(df['Date'] == check_date) & (df['Time'] == t_str)])
+                        # 直接在 ndarray 上數符合的列，不建中介 DataFrame
+                        existing_count = int(np.count_nonzero(
+                            (df['Date'].values == check_date) & (df['Time'].values == t_str)))
                         if existing_count >= limit:
                             limit_reached = True
                             st.error(f"⛔ Slot {check_date} {t_str} is FULL! ({existing_count}/{limit})")
                     
                     if not limit_reached:
-                        new_row = pd.DataFrame([{
+                        # 用 .loc 擴充一列，不用 concat 重建整個 DataFrame
+                        new_df = df.copy()
+                        new_df.attrs.pop('_cleaned', None)  # 新列尚未正規化
+                        new_df.loc[len(new_df)] = {
                             "Name": name, "ID": c_id, "Date": d.strftime("%Y-%m-%d"),
                             "Time": t_str, "Notes": notes, "LastUpdated": pd.NaT
-                        }])
-                        new_df = pd.concat([df, new_row], ignore_index=True)
+                        }
                         save_with_conflict_detection(new_df)
                         st.session_state.form_id += 1
 
@@ -380,13 +479,9 @@ with tab2:
         
         if st.button("💾 Save Changes to Cloud", type="primary"):
             clean_out = out.copy()
-            # 修正：確保在呼叫 strftime 前檢查是否為 NaT
-            clean_out['Date'] = clean_out['Date'].apply(
-                lambda x: x.strftime('%Y-%m-%d') if pd.notna(x) and hasattr(x, 'strftime') else (str(x) if pd.notna(x) and str(x) != 'NaT' else '')
-            )
-            clean_out['Time'] = clean_out['Time'].apply(
-                lambda x: x.strftime('%H:%M') if pd.notna(x) and hasattr(x, 'strftime') else (str(x) if pd.notna(x) and str(x) != 'NaT' else '')
-            )
+            # 向量化格式轉換，NaT 經 errors='coerce' 後統一補空字串
+            clean_out['Date'] = pd.to_datetime(clean_out['Date'], errors='coerce').dt.strftime('%Y-%m-%d').fillna('')
+            clean_out['Time'] = pd.to_datetime(clean_out['Time'].astype(str), format='%H:%M:%S', errors='coerce').dt.strftime('%H:%M').fillna('')
             save_with_conflict_detection(clean_out)
 
 # --- TAB 3: EXPORT ---
@@ -396,8 +491,12 @@ with tab3:
         st.markdown("### Visual Reports")
         st.write("If Chinese characters are missing in PDF, make sure `font.ttf` is uploaded.")
         if not df.empty:
-            st.download_button("📄 PDF Calendar", generate_visual_pdf(df), "cal.pdf", "application/pdf")
-            st.download_button("📊 Excel Calendar", generate_visual_excel(df), "cal.xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+            # 按下按鈕才產生報表，避免每次 rerun 都重新排版 PDF/Excel
+            if st.button("🛠️ Prepare Reports"):
+                key = (len(df), str(df['LastUpdated'].max()))
+                records = df[['Name', 'ID', 'Date', 'Time', 'Notes']].to_dict('records')
+                st.download_button("📄 PDF Calendar", _build_pdf(key, records), "cal.pdf", "application/pdf")
+                st.download_button("📊 Excel Calendar", _build_excel(key, records), "cal.xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
     
     with col2:
         st.markdown("### Import Backup")